@@ -3,34 +3,38 @@
 from __future__ import annotations
 
 import logging
+from typing import Final
 
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+import aiohttp
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE, Platform
+from homeassistant.core import Event, HomeAssistant
 from homeassistant.exceptions import ConfigEntryAuthFailed
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+from homeassistant.util.ssl import get_default_context
 
-from .const import CONF_LOCATION, CONF_PASSWORD, CONF_USERNAME, DATA_COORDINATOR, DOMAIN
-from .coordinator import HomelyDataUpdateCoordinator
+from .const import CONF_LOCATION, CONF_PASSWORD, CONF_USERNAME
+from .coordinator import HomelyConfigEntry, HomelyDataUpdateCoordinator
 from .homely import Homely, HomelyError
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS = [
-    Platform.SENSOR,
-]
+PLATFORMS: Final = (Platform.SENSOR,)
 
+# Concurrent API requests, on top of the realtime websocket connection.
+MAX_API_CONNECTIONS = 4
 
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up Homely from a config entry."""
-    hass.data.setdefault(DOMAIN, {})
 
+async def async_setup_entry(hass: HomeAssistant, entry: HomelyConfigEntry) -> bool:
+    """Set up Homely from a config entry."""
+    session = _async_create_session(hass, entry)
     homely_api = Homely(
         entry.data[CONF_USERNAME],
         entry.data[CONF_PASSWORD],
-        session=async_get_clientsession(hass),
+        session=session,
         location_id=entry.data[CONF_LOCATION],
     )
+    entry.async_on_unload(homely_api.cancel_requests)
 
     try:
         # Get API access-token.
@@ -40,12 +44,38 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     coordinator = HomelyDataUpdateCoordinator(hass, entry, homely_api)
     await coordinator.async_config_entry_first_refresh()
-    hass.data[DOMAIN][entry.entry_id] = {DATA_COORDINATOR: coordinator}
+    entry.runtime_data = coordinator
+    coordinator.async_start_realtime()
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
 
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+def _async_create_session(
+    hass: HomeAssistant, entry: HomelyConfigEntry
+) -> aiohttp.ClientSession:
+    """Create a session with its own keep-alive pool for the Homely API."""
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            # One connection is held by the realtime websocket.
+            limit_per_host=MAX_API_CONNECTIONS + 1,
+            keepalive_timeout=75,
+            ttl_dns_cache=300,
+            ssl=get_default_context(),
+        ),
+        headers={"User-Agent": SERVER_SOFTWARE},
+    )
+
+    async def _async_close_session(event: Event | None = None) -> None:
+        await session.close()
+
+    entry.async_on_unload(_async_close_session)
+    entry.async_on_unload(
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close_session)
+    )
+    return session
+
+
+async def async_unload_entry(hass: HomeAssistant, entry: HomelyConfigEntry) -> bool:
     """Unload a config entry."""
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
@@ -15,7 +15,6 @@ from homeassistant.const import (
 )
 
 DOMAIN: Final = "homely"
-DATA_COORDINATOR = "coordinator"
 
 # Translate Homely API alarm state to HA alarm states
 HOMELY_TO_HA_ALARM_STATE = {
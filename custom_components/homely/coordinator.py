@@ -1,10 +1,11 @@
 """Homepy API Data Coordinator."""
 
+import asyncio
 from datetime import timedelta
 import logging
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
 from .const import DOMAIN
@@ -12,6 +13,13 @@ from .homely import Homely, HomelyError
 
 _LOGGER = logging.getLogger(__name__)
 
+type HomelyConfigEntry = ConfigEntry[HomelyDataUpdateCoordinator]
+
+# Realtime events keep the data current, polling is only a safety net.
+FALLBACK_UPDATE_INTERVAL = timedelta(minutes=10)
+# Seconds to wait before reconnecting a dropped realtime connection.
+RECONNECT_DELAY = 30
+
 
 class HomelyDataUpdateCoordinator(DataUpdateCoordinator):
     """Homely Data Update Coordinator."""
@@ -30,8 +38,8 @@ class HomelyDataUpdateCoordinator(DataUpdateCoordinator):
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(seconds=30),
-            always_update=True,
+            update_interval=FALLBACK_UPDATE_INTERVAL,
+            always_update=False,
         )
 
     async def _async_update_data(self):
@@ -44,7 +52,66 @@ class HomelyDataUpdateCoordinator(DataUpdateCoordinator):
 
     def get_device_data(self, device_id):
         """Return a device details based on its ID."""
-        for device in self.data["devices"]:
-            if device.get("id") == device_id:
-                return device
-        return None
+        return self._client.get_device(device_id)
+
+    @callback
+    def async_start_realtime(self) -> None:
+        """Start listening for realtime events from Homely."""
+        self.entry.async_create_background_task(
+            self.hass, self._async_listen(), name=f"{DOMAIN} realtime"
+        )
+
+    async def _async_listen(self):
+        """Keep the realtime connection open, reconnecting when it drops."""
+        while True:
+            try:
+                await self._client.listen(
+                    self._handle_event, on_connect=self._handle_connect
+                )
+            except HomelyError as ex:
+                _LOGGER.debug("Homely realtime connection failed: %s", ex)
+            except Exception:
+                _LOGGER.exception("Unexpected error in Homely realtime connection")
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    @callback
+    def _handle_connect(self) -> None:
+        """Resync after (re)connecting, events may have been missed."""
+        self.entry.async_create_task(self.hass, self.async_request_refresh())
+
+    @callback
+    def _handle_event(self, event) -> None:
+        """Merge a realtime event into the coordinator data."""
+        if self.data is None:
+            return
+
+        try:
+            event_type = event.get("type")
+            payload = event.get("data", {})
+
+            if event_type == "device-state-changed":
+                device = self._client.get_device(payload.get("deviceId"))
+                if device is None:
+                    return
+                # Copy instead of mutating, entities compare device identity.
+                features = dict(device["features"])
+                for change in payload.get("changes", ()):
+                    feature = dict(features.get(change["feature"], {}))
+                    states = dict(feature.get("states", {}))
+                    states[change["stateName"]] = {
+                        **states.get(change["stateName"], {}),
+                        "value": change.get("value"),
+                        "lastUpdated": change.get("lastUpdated"),
+                    }
+                    feature["states"] = states
+                    features[change["feature"]] = feature
+                data = self._client.replace_device({**device, "features": features})
+            elif event_type == "alarm-state-changed":
+                data = self._client.set_alarm_state(payload.get("state", "UNKNOWN"))
+            else:
+                return
+        except (AttributeError, KeyError, TypeError):
+            _LOGGER.warning("Skipping malformed Homely event: %s", event)
+            return
+
+        self.async_set_updated_data(data)
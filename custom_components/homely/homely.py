@@ -1,13 +1,12 @@
 """Homely API client."""
 
 import asyncio
-from datetime import datetime, timedelta
-import json
 import logging
+import time
 
-from aiohttp import ClientError
+from aiohttp import ClientError, WSMsgType
+import orjson
 
-logging.basicConfig(level=logging.DEBUG)
 _LOGGER = logging.getLogger(__name__)
 
 
@@ -54,6 +53,7 @@ class Homely:
     URL_TOKEN_REFRESH = URL_API + "/oauth/refresh-token"
     URL_LOCATIONS = URL_API + "/locations"
     URL_LOCATION_DATA = URL_API + "/home/"
+    URL_WEBSOCKET = "wss://sdk.iotiliti.cloud/socket.io/"
 
     """Minimum time between requests"""
     REFRESH_LIMIT = 10
@@ -67,35 +67,48 @@ class Homely:
         self._username = username
         self._password = password
         self._access_token = None
-        self._access_token_expire = datetime.now() - timedelta(hours=1)
+        self._auth_headers = {}
+        # Expiry times are time.monotonic() seconds.
+        self._access_token_expire = 0.0
         self._refresh_token = None
-        self._refresh_token_expire = datetime.now() - timedelta(hours=1)
+        self._refresh_token_expire = 0.0
 
         self._locations = {}
 
         self._location_id = location_id
         self._location_data = None
-        self._data_refreshed = datetime.now() - timedelta(
-            seconds=(self.REFRESH_LIMIT + 60)
-        )
+        self._device_index = {}
+        self._next_refresh_at = 0.0
+
+        # Requests currently in flight, shared by concurrent callers.
+        self._inflight = {}
 
-    async def _request(self, url, data=None, req_type="GET"):
+    async def _request(self, url, *, headers=None, data=None, req_type="GET"):
         """Handle requests to API."""
         try:
             if req_type == "GET":
                 # GET
                 async with asyncio.timeout(REQ_TIMEOUT):
-                    response = await self._session.get(url=url, headers=data)
+                    response = await self._session.get(
+                        url=url, headers=headers, data=data
+                    )
             elif req_type == "POST":
                 # POST.
                 async with asyncio.timeout(REQ_TIMEOUT):
-                    response = await self._session.post(url=url, data=data)
+                    response = await self._session.post(
+                        url=url, headers=headers, data=data
+                    )
             else:
                 raise InvalidArgument("req_type must be either GET or POST")
 
-            _LOGGER.debug("Homely Request status code: %s", response.status)
-            if response.status > 201:
-                _LOGGER.debug("Homely Request status code: %s", response.text)
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug("Homely Request status code: %s", response.status)
+                if response.status > 201:
+                    _LOGGER.debug(
+                        "Homely Request status code: %s, body: %s",
+                        response.status,
+                        await response.text(),
+                    )
 
             return response  # noqa: TRY300
 
@@ -119,7 +132,7 @@ class Homely:
         )
 
         if response.status >= 500:
-            raise ResponseError(response.status, response.text)
+            raise ResponseError(response.status, await response.text())
 
         if response.status == 400:
             raise LoginError("Invalid refresh token")
@@ -129,64 +142,115 @@ class Homely:
 
         if response.status in [200, 201]:
             # Success
-            resp_data = json.loads(await response.text())
+            resp_data = orjson.loads(await response.read())
 
-            self._access_token = resp_data["access_token"]
-            self._access_token_expire = datetime.now() + timedelta(
-                seconds=(int(resp_data["expires_in"]) - self.TOKEN_EXPIRE_MARGIN)
-            )
-            self._refresh_token = resp_data["refresh_token"]
-            self._refresh_token_expire = datetime.now() + timedelta(
-                seconds=(
-                    int(resp_data["refresh_expires_in"]) - self.TOKEN_EXPIRE_MARGIN
-                )
-            )
+            self._set_tokens(resp_data)
             return True
 
         return False
 
-    def _token_expired(self, expire: datetime):
-        if datetime.now() > expire:
-            return True
-        return False
+    def _set_tokens(self, resp_data):
+        """Store access and refresh tokens from a token response."""
+        now = time.monotonic()
+        self._access_token = resp_data["access_token"]
+        self._auth_headers = {"Authorization": f"Bearer {self._access_token}"}
+        self._access_token_expire = (
+            now + int(resp_data["expires_in"]) - self.TOKEN_EXPIRE_MARGIN
+        )
+        self._refresh_token = resp_data["refresh_token"]
+        self._refresh_token_expire = (
+            now + int(resp_data["refresh_expires_in"]) - self.TOKEN_EXPIRE_MARGIN
+        )
+
+    def _token_expired(self, expire: float):
+        return time.monotonic() > expire
 
     def _access_token_valid(self):
         """Check if we have an access token and that it is not expired."""
-        if self._access_token is None or self._token_expired(self._access_token_expire):
-            return False
-        return True
+        return (
+            self._access_token is not None
+            and time.monotonic() <= self._access_token_expire
+        )
 
     def set_location_id(self, location_id) -> None:
         """Set the location ID for update requests."""
         self._location_id = location_id
 
+    async def _single_flight(self, key, func, *args):
+        """Run func, or wait for the same request if it is already in flight."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(func(*args))
+            self._inflight[key] = task
+
+            def _done(_) -> None:
+                if self._inflight.get(key) is task:
+                    del self._inflight[key]
+
+            task.add_done_callback(_done)
+        return await asyncio.shield(task)
+
+    def cancel_requests(self) -> None:
+        """Cancel the shared requests still in flight."""
+        for task in list(self._inflight.values()):
+            task.cancel()
+
     async def _get_location_data(self, location_id=None):
         """Get the current data from the selected location."""
+        if time.monotonic() < self._next_refresh_at:
+            _LOGGER.debug("Location data is still valid")
+            return True
+        return await self._single_flight(
+            ("location", location_id), self._fetch_location_data, location_id
+        )
+
+    async def _fetch_location_data(self, location_id=None):
+        """Request the current data from the selected location."""
 
         if self._location_id is None and location_id is None:
             raise LoginError("Invalid location ID")
 
-        # Make sure access-token is up to date.
-        await self.get_token()
-
         # Prioritize location ID from parameter.
         if location_id is not None:
             req_loc_id = location_id
         else:
             req_loc_id = self._location_id
+        url = f"{self.URL_LOCATION_DATA}{req_loc_id}"
 
-        next_refresh = self._data_refreshed + timedelta(seconds=self.REFRESH_LIMIT)
-        if datetime.now() < next_refresh:
-            _LOGGER.debug("Location data is still valid")
-            return True
-
-        data = {"Authorization": f"Bearer {self._access_token}"}
-        response = await self._request(
-            url=f"{self.URL_LOCATION_DATA}{req_loc_id}", data=data, req_type="GET"
-        )
+        if self._access_token_valid():
+            response = await self._request(
+                url=url, headers=self._auth_headers, req_type="GET"
+            )
+        elif (
+            self._access_token is not None
+            and time.monotonic() < self._access_token_expire + self.TOKEN_EXPIRE_MARGIN
+        ):
+            # The token expired within the margin, so the server likely still
+            # accepts it. Refresh it while fetching with the old one.
+            token_result, response = await asyncio.gather(
+                self.get_token(),
+                self._request(url=url, headers=self._auth_headers, req_type="GET"),
+                return_exceptions=True,
+            )
+            if isinstance(token_result, BaseException):
+                if not isinstance(response, BaseException):
+                    response.release()
+                raise token_result
+            if isinstance(response, BaseException):
+                raise response
+            if response.status == 401:
+                response.release()
+                response = await self._request(
+                    url=url, headers=self._auth_headers, req_type="GET"
+                )
+        else:
+            await self.get_token()
+            response = await self._request(
+                url=url, headers=self._auth_headers, req_type="GET"
+            )
 
         if response.status >= 500:
-            raise ResponseError(response.status, response.text)
+            raise ResponseError(response.status, await response.text())
 
         if response.status == 400:
             raise LoginError("Invalid location ID")
@@ -196,14 +260,68 @@ class Homely:
 
         if response.status in [200, 201]:
             # Success
-            self._location_data = json.loads(await response.text())
-            self._data_refreshed = datetime.now()
+            self._merge_location_data(orjson.loads(await response.read()))
+            self._next_refresh_at = time.monotonic() + self.REFRESH_LIMIT
             return True
 
         return False
 
+    def _merge_location_data(self, new_data):
+        """Merge fresh location data into the cached data.
+
+        Unchanged devices keep their object identity. The cached data is only
+        replaced when something changed, so an unchanged refresh returns the
+        very same object.
+        """
+        devices = []
+        device_index = {}
+        for new_device in new_data.get("devices", []):
+            device_id = new_device["id"]
+            device = self._device_index.get(device_id)
+            if device != new_device:
+                device = new_device
+            devices.append(device)
+            device_index[device_id] = device
+
+        new_data["devices"] = devices
+        self._device_index = device_index
+        if new_data != self._location_data:
+            self._location_data = new_data
+
+    def get_device(self, device_id):
+        """Return the cached data of a device based on its ID."""
+        return self._device_index.get(device_id)
+
+    def replace_device(self, device):
+        """Swap a changed device into a new copy of the cached data."""
+        old_device = self._device_index.get(device["id"])
+        self._device_index[device["id"]] = device
+        self._location_data = {
+            **self._location_data,
+            "devices": [
+                device if entry is old_device else entry
+                for entry in self._location_data["devices"]
+            ],
+        }
+        return self._location_data
+
+    def set_alarm_state(self, state):
+        """Set the alarm state in a new copy of the cached data."""
+        self._location_data = {**self._location_data, "alarmState": state}
+        return self._location_data
+
     async def get_token(self):
         """Request or refresh access token."""
+        if (
+            self._access_token is not None
+            and time.monotonic() <= self._access_token_expire
+        ):
+            # Access token still valid. No reason to get a new one.
+            return True
+        return await self._single_flight("token", self._get_token)
+
+    async def _get_token(self):
+        """Request or refresh access token, unless it is still valid."""
 
         if self._access_token_valid():
             # Access token still valid. No reason to get a new one.
@@ -225,24 +343,17 @@ class Homely:
         response = await self._request(url=self.URL_TOKEN, data=data, req_type="POST")
 
         if response.status >= 500:
-            raise ResponseError(response.status, response.text)
+            raise ResponseError(response.status, await response.text())
 
         if response.status >= 400:
             raise LoginError("Invalid credentials")
 
         if response.status in [200, 201]:
             # Success
-            resp_data = json.loads(await response.text())
+            resp_data = orjson.loads(await response.read())
 
         # Set access and refresh tokens.
-        self._access_token = resp_data["access_token"]
-        self._access_token_expire = datetime.now() + timedelta(
-            seconds=(int(resp_data["expires_in"]) - self.TOKEN_EXPIRE_MARGIN)
-        )
-        self._refresh_token = resp_data["refresh_token"]
-        self._refresh_token_expire = datetime.now() + timedelta(
-            seconds=(int(resp_data["refresh_expires_in"]) - self.TOKEN_EXPIRE_MARGIN)
-        )
+        self._set_tokens(resp_data)
         return True
 
     async def get_users_locations(self):
@@ -253,24 +364,99 @@ class Homely:
             raise LoginError("No valid access token")
 
         # User must be owner or administrator to be able to access locations
-        data = {"Authorization": f"Bearer {self._access_token}"}
         response = await self._request(
-            url=self.URL_LOCATIONS, data=data, req_type="GET"
+            url=self.URL_LOCATIONS, headers=self._auth_headers, req_type="GET"
         )
 
         if response.status >= 500:
-            raise ResponseError(response.status, response.text)
+            raise ResponseError(response.status, await response.text())
 
         if response.status >= 400:
             raise LoginError("Unauthorized")
 
         if response.status in [200, 201]:
             # Success
-            resp_data = json.loads(await response.text())
+            resp_data = orjson.loads(await response.read())
 
         self._locations = resp_data
         return self._locations
 
+    async def listen(self, on_event, location_id=None, on_connect=None):
+        """Listen for realtime events from the selected location.
+
+        Calls on_connect once the connection is acknowledged, then on_event
+        with each event payload until the connection closes.
+        """
+        if self._location_id is None and location_id is None:
+            raise LoginError("Invalid location ID")
+
+        # Make sure access-token is up to date.
+        await self.get_token()
+
+        # Prioritize location ID from parameter.
+        if location_id is not None:
+            req_loc_id = location_id
+        else:
+            req_loc_id = self._location_id
+
+        # Socket.IO over Engine.IO v4, websocket transport only.
+        params = {
+            "locationId": req_loc_id,
+            "token": f"Bearer {self._access_token}",
+            "EIO": "4",
+            "transport": "websocket",
+        }
+        # Until the handshake tells us the ping interval.
+        receive_timeout = REQ_TIMEOUT
+
+        try:
+            async with self._session.ws_connect(
+                self.URL_WEBSOCKET, params=params
+            ) as ws:
+                while True:
+                    msg = await ws.receive(timeout=receive_timeout)
+                    if msg.type != WSMsgType.TEXT:
+                        if msg.type in (
+                            WSMsgType.CLOSE,
+                            WSMsgType.CLOSING,
+                            WSMsgType.CLOSED,
+                            WSMsgType.ERROR,
+                        ):
+                            _LOGGER.debug("Homely realtime connection closed")
+                            return
+                        continue
+
+                    packet = msg.data
+                    if packet.startswith("0"):
+                        # Engine.IO open. Connect to the default namespace.
+                        handshake = orjson.loads(packet[1:])
+                        receive_timeout = (
+                            handshake["pingInterval"] + handshake["pingTimeout"]
+                        ) / 1000
+                        await ws.send_str("40")
+                    elif packet == "2":
+                        # Engine.IO ping.
+                        await ws.send_str("3")
+                    elif packet.startswith("40"):
+                        # Socket.IO connect acknowledged.
+                        if on_connect is not None:
+                            on_connect()
+                    elif packet.startswith("42"):
+                        # Socket.IO event.
+                        name, *args = orjson.loads(packet[2:])
+                        if name == "event" and args:
+                            on_event(args[0])
+                    elif packet.startswith("44"):
+                        raise LoginError(f"Realtime connection refused: {packet[2:]}")
+                    elif packet in ("1", "41"):
+                        _LOGGER.debug("Homely realtime connection closed by server")
+                        return
+
+        except ClientError as ex:
+            raise RequestFailed(f"Homely realtime connection failed ({ex=})") from ex
+        except TimeoutError as ex:
+            raise RequestFailed("Realtime connection timeout") from ex
+
     async def get_system_state(self, location_id=None):
         """Get the alarm state."""
         # First refresh data.
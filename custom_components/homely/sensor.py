@@ -7,16 +7,15 @@ from homeassistant.components.sensor import (
     SensorEntity,
     SensorStateClass,
 )
-from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import PERCENTAGE, UnitOfTemperature
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.entity import Entity
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import CONF_LOCATION, DATA_COORDINATOR, DOMAIN
-from .coordinator import HomelyDataUpdateCoordinator
+from .const import CONF_LOCATION, DOMAIN
+from .coordinator import HomelyConfigEntry, HomelyDataUpdateCoordinator
 
 STATE_DISARMED = "state_disarmed"
 STATE_ARMED_AWAY = "state_armed_away"
@@ -26,24 +25,41 @@ STATE_BREACHED = "state_breached"
 STATE_PENDING = "state_pending"
 STATE_UNKNOWN = "state_unknown"
 
+# Alarm state translations
+# In case Homely change the states.
+# Pending states are during entry/exit-delay
+_ALARM_STATES = {
+    "DISARMED": STATE_DISARMED,
+    "ARMED_AWAY": STATE_ARMED_AWAY,
+    "ARMED_STAY": STATE_ARMED_HOME,
+    "ARMED_NIGHT": STATE_ARMED_NIGHT,
+    "BREACHED": STATE_BREACHED,
+    "ARM_PENDING": STATE_PENDING,
+    "ARM_STAY_PENDING": STATE_PENDING,
+    "ARM_NIGHT_PENDING": STATE_PENDING,
+    "UNKNOWN": STATE_UNKNOWN,
+}
+_ALARM_STATE_OPTIONS = list(dict.fromkeys(_ALARM_STATES.values()))
+
+# Assume all batteries are 3V.
+BATTERY_PERCENT_PER_VOLT = 100.0 / 3.0
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
-    entry: ConfigEntry,
+    entry: HomelyConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up Homely sensors based on a config entry."""
-    coordinator: HomelyDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id][
-        DATA_COORDINATOR
-    ]
+    coordinator = entry.runtime_data
 
-    sensors: list[Entity] = []
-    sensors.append(HomelyAlarmState(coordinator))  # The Alarm state sensor.
+    sensors: list[Entity] = [HomelyAlarmState(coordinator)]  # The Alarm state sensor.
 
     for device in coordinator.data["devices"]:
-        if "temperature" in device["features"]:
-            sensors.append(HomelyThermometer(coordinator, device))  # noqa: PERF401
-        if "battery" in device["features"]:
+        features = device["features"]
+        if "temperature" in features:
+            sensors.append(HomelyThermometer(coordinator, device))
+        if "battery" in features:
             sensors.append(HomelyBattery(coordinator, device))
     async_add_entities(sensors)
 
@@ -51,26 +67,16 @@ async def async_setup_entry(
 class HomelyAlarmState(CoordinatorEntity[HomelyDataUpdateCoordinator], SensorEntity):
     """Representation of Homely Alarm State."""
 
-    # Alarm state translations
-    # In case Homely change the states.
-    # Pending states are during entry/exit-delay
-    _alarm_states = {
-        "DISARMED": STATE_DISARMED,
-        "ARMED_AWAY": STATE_ARMED_AWAY,
-        "ARMED_STAY": STATE_ARMED_HOME,
-        "ARMED_NIGHT": STATE_ARMED_NIGHT,
-        "BREACHED": STATE_BREACHED,
-        "ARM_PENDING": STATE_PENDING,
-        "ARM_STAY_PENDING": STATE_PENDING,
-        "ARM_NIGHT_PENDING": STATE_PENDING,
-        "UNKNOWN": STATE_UNKNOWN,
-    }
-
     _attr_device_class = SensorDeviceClass.ENUM
     _attr_has_entity_name = True
-    _attr_options = list(dict.fromkeys(_alarm_states.values()))
+    _attr_options = _ALARM_STATE_OPTIONS
     _attr_translation_key = "system_state"
 
+    def __init__(self, coordinator: HomelyDataUpdateCoordinator) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator)
+        self._update_native_value()
+
     @property
     def device_info(self) -> DeviceInfo:
         """Return device information about this entity."""
@@ -87,13 +93,18 @@ class HomelyAlarmState(CoordinatorEntity[HomelyDataUpdateCoordinator], SensorEnt
         """Return the unique ID for this location."""
         return self.coordinator.entry.data[CONF_LOCATION]
 
-    @property
-    def native_value(self) -> str | None:
-        """Return the state of the entity."""
-        return self._alarm_states.get(
+    def _update_native_value(self) -> None:
+        """Translate the alarm state from the coordinator data."""
+        self._attr_native_value = _ALARM_STATES.get(
             self.coordinator.data.get("alarmState", "UNKNOWN")
         )
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Update the alarm state when the coordinator updates."""
+        self._update_native_value()
+        super()._handle_coordinator_update()
+
 
 class HomelyThermometer(CoordinatorEntity[HomelyDataUpdateCoordinator], SensorEntity):
     """Representation of a Homely thermometer."""
@@ -109,6 +120,7 @@ class HomelyThermometer(CoordinatorEntity[HomelyDataUpdateCoordinator], SensorEn
         self._device_data = device_data  # All device data from API
         self._device_id = device_data["id"]  # Homely-Device ID
         self._attr_unique_id = f"{self._device_id}_temperature"
+        self._last_update_success = coordinator.last_update_success
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -122,10 +134,23 @@ class HomelyThermometer(CoordinatorEntity[HomelyDataUpdateCoordinator], SensorEn
             via_device=(DOMAIN, self.coordinator.entry.data[CONF_LOCATION]),
         )
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Refresh the cached device data when the coordinator updates."""
+        device_data = self.coordinator.get_device_data(self._device_id)
+        # Changed devices are new objects, skip the write if this one is not.
+        if (
+            device_data is self._device_data
+            and self.coordinator.last_update_success == self._last_update_success
+        ):
+            return
+        self._device_data = device_data
+        self._last_update_success = self.coordinator.last_update_success
+        super()._handle_coordinator_update()
+
     @property
     def native_value(self) -> str | None:
         """Return the state of the entity."""
-        self._device_data = self.coordinator.get_device_data(self._device_id)
         return self._device_data["features"]["temperature"]["states"][
             "temperature"
         ].get("value", None)
@@ -133,8 +158,6 @@ class HomelyThermometer(CoordinatorEntity[HomelyDataUpdateCoordinator], SensorEn
     @property
     def available(self) -> bool:
         """Return True if entity is available."""
-        self._device_data = self.coordinator.get_device_data(self._device_id)
-
         return super().available and self._device_data.get("online", False)
 
 
@@ -152,6 +175,8 @@ class HomelyBattery(CoordinatorEntity[HomelyDataUpdateCoordinator], SensorEntity
         self._device_data = device_data  # All device data from API
         self._device_id = device_data["id"]  # Homely-Device ID
         self._attr_unique_id = f"{self._device_id}_battery"
+        self._last_update_success = coordinator.last_update_success
+        self._voltage_state = self._get_voltage_state()
 
     @property
     def device_info(self) -> DeviceInfo:
@@ -164,33 +189,34 @@ class HomelyBattery(CoordinatorEntity[HomelyDataUpdateCoordinator], SensorEntity
             via_device=(DOMAIN, self._device_id),
         )
 
+    def _get_voltage_state(self):
+        """Return the battery voltage state from the device data."""
+        return self._device_data["features"]["battery"]["states"]["voltage"]
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Refresh the cached device data when the coordinator updates."""
+        device_data = self.coordinator.get_device_data(self._device_id)
+        # Changed devices are new objects, skip the write if this one is not.
+        if (
+            device_data is self._device_data
+            and self.coordinator.last_update_success == self._last_update_success
+        ):
+            return
+        self._device_data = device_data
+        self._last_update_success = self.coordinator.last_update_success
+        self._voltage_state = self._get_voltage_state()
+        super()._handle_coordinator_update()
+
     @property
     def native_value(self) -> str | None:
         """Return the state of the entity."""
-        self._device_data = self.coordinator.get_device_data(self._device_id)
-        # Assume all batteries are 3V.
+        voltage = float(self._voltage_state.get("value") or 0.0)
         # Limit the value between 0 and 100
-        battery_percent = max(
-            (
-                min(
-                    (
-                        float(
-                            self._device_data["features"]["battery"]["states"][
-                                "voltage"
-                            ].get("value", "0.0")
-                        )
-                        * 33.33333
-                    ),
-                    100.0,
-                )
-            ),
-            0.0,
-        )
+        battery_percent = min(max(voltage * BATTERY_PERCENT_PER_VOLT, 0.0), 100.0)
         return f"{battery_percent:.0f}"
 
     @property
     def available(self) -> bool:
         """Return True if entity is available."""
-        self._device_data = self.coordinator.get_device_data(self._device_id)
-
         return super().available and self._device_data.get("online", False)